@@ -3,6 +3,8 @@
 import datetime
 import random
 import json
+import threading
+from collections import namedtuple, OrderedDict
 from copy import deepcopy
 from faker import Faker
 from jsf import JSF
@@ -26,6 +28,32 @@ Geojson_point = """{{
 }}"""
 
 
+AdapterDefaults = namedtuple('AdapterDefaults', 'parameters interval historic_start')
+
+# {source_id: (raw metadata, AdapterDefaults)}, see adapter_defaults
+_adapter_defaults = {}
+
+
+def adapter_defaults(weather_adapter):
+    """Default parameters (as a comma separated string), interval and historic start date of a weather adapter
+
+    Defaults are computed once per source, and recomputed only if its metadata change
+    """
+    raw = (tuple(weather_adapter['parameters']['common']),
+           weather_adapter['temporal']['intervals'][0],
+           weather_adapter['temporal']['historic']['start'])
+    cached = _adapter_defaults.get(weather_adapter.get('id'))
+    if cached is not None and cached[0] == raw:
+        return cached[1]
+    parameters, interval, start = raw
+    if start is not None:
+        # use next day to avoid timezone problems
+        start = datetime.datetime.fromisoformat(start) + datetime.timedelta(days=1)
+    defaults = AdapterDefaults(','.join(map(str, parameters)), interval, start)
+    _adapter_defaults[weather_adapter.get('id')] = (raw, defaults)
+    return defaults
+
+
 def weather_adapter_params(weather_adapter,
                            parameters=None,
                            time_start=None,
@@ -49,28 +77,31 @@ def weather_adapter_params(weather_adapter,
             WGS84 Decimal degrees
          longitude : Union[int,float],
             WGS84 Decimal degrees
-        timeStart : str,
+        timeStart : str or datetime,
              Start of weather data period (ISO-8601 Timestamp, e.g. 2020-06-12T00:00:00+03:00), by default to day (forecast) or first date available (historical)'
-         timeEnd : str, optional
+         timeEnd : str or datetime, optional
              End of weather data period (ISO-8601 Timestamp, e.g. 2020-07-03T00:00:00+03:00), by default tommorow (forecast) one day after first date (historical)
+             datetime objects are also accepted for both bounds, naive ones being considered as local time
          weatherStationId : int,
              a location id
     """
     fake = {}
+    defaults = adapter_defaults(weather_adapter)
 
     if parameters is None:
-        parameters = weather_adapter['parameters']['common']
-    fake.update(dict(parameters=','.join(map(str, parameters))))
+        fake.update(dict(parameters=defaults.parameters))
+    else:
+        fake.update(dict(parameters=','.join(map(str, parameters))))
 
     if interval is None:
-        interval = weather_adapter['temporal']['intervals'][0]
+        interval = defaults.interval
     fake.update({'interval': interval})
 
-    if weather_adapter['temporal']['historic']['start'] is not None:
+    if defaults.historic_start is not None:
         if time_start is None:
-            start = weather_adapter['temporal']['historic']['start']
-            # use next day to avoid timezone problems
-            start = datetime.datetime.fromisoformat(start) + datetime.timedelta(days=1)
+            start = defaults.historic_start
+        elif isinstance(time_start, datetime.datetime):
+            start = time_start
         else:
             start = datetime.datetime.fromisoformat(time_start)
         time_start = start.astimezone().isoformat()
@@ -80,6 +111,8 @@ def weather_adapter_params(weather_adapter,
             else:
                 end = start + datetime.timedelta(days=1)
             time_end = end.astimezone().isoformat()
+        elif isinstance(time_end, datetime.datetime):
+            time_end = time_end.astimezone().isoformat()
         fake.update(dict(timeStart=time_start, timeEnd=time_end, ignoreErrors='true'))
 
     if weather_adapter['access_type'] == 'location':
@@ -94,14 +127,15 @@ def weather_adapter_params(weather_adapter,
             fake['latitude'] = float(lat)
     elif weather_adapter['access_type'] == 'stations':
         if station_id is None:
-            features = weather_adapter["spatial"]["geoJSON"]['features']
-            ids = [int(random.uniform(1, 100))]
+            geojson = weather_adapter["spatial"]["geoJSON"]
+            if isinstance(geojson, str):
+                geojson = json.loads(geojson)
+            features = geojson['features']
             if len(features) > 0:
-                if 'id' in features[0]:
-                    ids = [item['id'] for item in features]
-                else:
-                    ids = [item['properties']['id'] for item in features]
-            station_id = random.sample(ids, 1)[0]
+                feature = random.choice(features)
+                station_id = feature['id'] if 'id' in features[0] else feature['properties']['id']
+            else:
+                station_id = int(random.uniform(1, 100))
         fake.update(dict(weatherStationId=station_id))
     else:
         raise ValueError("Unknown access type : " + weather_adapter['access_type'])
@@ -120,7 +154,8 @@ def weather_data(parameters=(1001, 1002), time_start=None, time_end=None, interv
         parameters = list(parameters)
     fake['weatherParameters'] = [int(p) for p in parameters]
 
-    assert interval in [3600, 86400]
+    if interval not in (3600, 86400):
+        raise ValueError('interval should be 3600 or 86400, not %s' % interval)
     if time_start is None:
         if time_end is not None:
             if interval == 3600:
@@ -141,7 +176,8 @@ def weather_data(parameters=(1001, 1002), time_start=None, time_end=None, interv
         else:
             time_end = datetime.datetime.fromisoformat(time_end).astimezone()
             delta = time_end - time_start
-            assert delta.total_seconds() >= 0, 'time_end should be after time_start'
+            if delta.total_seconds() < 0:
+                raise ValueError('time_end should be after time_start')
             if interval == 3600:
                 hours = delta.total_seconds() // 3600
                 length = int(hours) + 1
@@ -149,8 +185,10 @@ def weather_data(parameters=(1001, 1002), time_start=None, time_end=None, interv
                 length = int(delta.days) + 1
         data = [[p / 10 for p in random.sample(range(100), width)] for _ in range(length)]
     else:
-        assert len(data) > 0
-        assert len(data[0]) == width, 'data should be a list of tuples, each being as long as parameters'
+        if len(data) == 0:
+            raise ValueError('data should not be empty')
+        if len(data[0]) != width:
+            raise ValueError('data should be a list of tuples, each being as long as parameters')
         length = len(data)
         if interval == 3600:
             time_end = time_start + datetime.timedelta(hours=length - 1)
@@ -237,6 +275,37 @@ def model_weather_data(model, time_start=None, time_end=None, length=3):
                         interval=interval, length=length, valid_spatial=valid_spatial)
 
 
+WeatherRequirements = namedtuple('WeatherRequirements', 'parameters interval')
+_weather_requirements = {}
+
+
+def weather_requirements(model):
+    """Weather parameter codes (as a frozenset) and interval required by a model
+
+    Requirements are computed once per model, and recomputed only if its weather parameters change
+    """
+    weather_parameters = model['input']['weather_parameters']
+    key = (model['id'], model.get('version'))
+    cached = _weather_requirements.get(key)
+    if cached is not None and cached[0] is weather_parameters:
+        return cached[1]
+    requirements = WeatherRequirements(frozenset(item['parameter_code'] for item in weather_parameters),
+                                       weather_parameters[0]['interval'])
+    # keep a reference to weather_parameters, so that its id is not recycled
+    _weather_requirements[key] = (weather_parameters, requirements)
+    return requirements
+
+
+def check_weather_data(model, weather_data):
+    """Check that weather_data provides all weather parameters required by model, at the expected interval (raise a ValueError otherwise)"""
+    required, interval = weather_requirements(model)
+    if weather_data['interval'] != interval:
+        raise ValueError('weather_data interval should be %s' % interval)
+    missing = required.difference(weather_data['weatherParameters'])
+    if missing:
+        raise ValueError('weather_data misses parameters required by the model: %s' % sorted(missing))
+
+
 def model_field_observations(model, quantifications, latitude=None, longitude=None, time=None, pest=None, crop=None):
     """generate common part of field observation
 
@@ -248,17 +317,19 @@ def model_field_observations(model, quantifications, latitude=None, longitude=No
     if time is None:
         start = datetime.datetime.today().astimezone()
         time = [(start + datetime.timedelta(days=i)).isoformat() for i in range(length)]
+    elif len(time) != length:
+        raise ValueError('time should be as long as quantifications')
     if pest is None:
-        pest = random.sample(model['pests'], 1)[0]
+        pest = random.choice(model['pests'])
     if crop is None:
-        crop = random.sample(model['crops'], 1)[0]
+        crop = random.choice(model['crops'])
     field_obs = [{'fieldObservation': {'location': location,
-                                        'time': time[i],
+                                        'time': t,
                                         'pestEPPOCode': pest,
                                         'cropEPPOCode': crop
                                        },
-                  'quantification': quantifications[i]
-                  } for i in range(length)]
+                  'quantification': quantification
+                  } for t, quantification in zip(time, quantifications)]
     return field_obs
 
 
@@ -267,7 +338,9 @@ def set_default(fake_value, schema):
         for k, v in fake_value.items():
             fake_value[k] = set_default(v, schema['properties'][k])
     else:
-        fake_value = schema.get('default', fake_value)
+        if 'default' in schema:
+            # prepared schemas are shared (see prepare_input_schema): copy mutable defaults
+            fake_value = deepcopy(schema['default'])
         if schema['type'] == 'number':
             fake_value = float(fake_value)
         if schema['type'] == 'integer':
@@ -279,6 +352,45 @@ def set_default(fake_value, schema):
     return fake_value
 
 
+class _NoDefault(Exception):
+    pass
+
+
+def _default_value(schema, skip, path):
+    if path in skip:
+        return None
+    if schema.get('type') == 'object' and 'properties' in schema:
+        return {k: _default_value(v, skip, path + (k,)) for k, v in schema['properties'].items()}
+    if 'default' not in schema:
+        raise _NoDefault(path)
+    # set_default returns a copy of the default, that callers can modify
+    return set_default(schema['default'], schema)
+
+
+def default_instance(schema, skip=()):
+    """Build an instance of an object schema from the defaults of its properties
+
+    The result is the same as faking it with all properties required and then
+    setting defaults (see set_default), without running JSF.
+
+    Parameters
+    ----------
+    schema : dict
+        an object json schema
+    skip : list of tuples
+        path (sequence of property names) of properties that do not need a default. They are set to None
+
+    Returns
+    -------
+    dict or None
+        None if some property has no default
+    """
+    try:
+        return _default_value(schema, skip, ())
+    except _NoDefault:
+        return None
+
+
 def set_all_required(schema):
     schema['required'] = list(schema['properties'].keys())
     for k, v in schema['properties'].items():
@@ -287,13 +399,36 @@ def set_all_required(schema):
     return schema
 
 
-def input_data(model, weather_data=None, field_observations=None, requires_all=True,
-               check_default=True):
-    if model['execution']['type'] == 'LINK':
-        return None
-    else:
-        input_schema = deepcopy(model['execution']['input_schema'])
+PreparedSchema = namedtuple('PreparedSchema', 'input_schema weather fieldobs fakeloc faker')
+
+# prepared input schemas and their faker, see prepare_input_schema
+_input_schemas = OrderedDict()
+_input_schemas_lock = threading.Lock()
+# number of models kept, least recently used ones are dropped first
+INPUT_SCHEMAS_MAXSIZE = 128
 
+
+def prepare_input_schema(model, requires_all=True):
+    """Prepare the input schema of a model for faking, and its JSF faker
+
+    Preparation is cached for the INPUT_SCHEMAS_MAXSIZE last used models: it
+    is done once as long as the same input_schema object is used.
+
+    Returns
+    -------
+    PreparedSchema
+        (input_schema, weather, fieldobs, fakeloc, faker) named tuple: the prepared schema, whether the model needs
+        weather data and field observations, the path to fieldObservations and the JSF faker of the schema
+    """
+    key = (model['id'], model.get('version'), requires_all)
+    source = model['execution']['input_schema']
+    with _input_schemas_lock:
+        cached = _input_schemas.get(key)
+        if cached is not None and cached[0] is source:
+            _input_schemas.move_to_end(key)
+            return cached[1]
+
+    input_schema = deepcopy(source)
     weather = False
     fieldobs = False
     fieldloc = input_schema
@@ -331,33 +466,61 @@ def input_data(model, weather_data=None, field_observations=None, requires_all=T
         if input_schema['type'] == 'object':
             input_schema = set_all_required(input_schema)
 
-    jsf_faker = JSF(input_schema)
-    fake = jsf_faker.generate()
+    prepared = PreparedSchema(input_schema, weather, fieldobs, tuple(fakeloc), JSF(input_schema))
+    with _input_schemas_lock:
+        # keep a reference to source, so that its id is not recycled
+        _input_schemas[key] = (source, prepared)
+        _input_schemas.move_to_end(key)
+        if len(_input_schemas) > INPUT_SCHEMAS_MAXSIZE:
+            _input_schemas.popitem(last=False)
+    return prepared
+
 
-    if check_default:
-        for k, v in fake.items():
-            fake[k] = set_default(v, input_schema['properties'][k])
+def input_data(model, weather_data=None, field_observations=None, requires_all=True,
+               check_default=True):
+    if model['execution']['type'] == 'LINK':
+        return None
 
-    if weather:
+    prepared = prepare_input_schema(model, requires_all)
+
+    fake = None
+    if requires_all and check_default and prepared.input_schema['type'] == 'object':
+        # fake values would be replaced by defaults anyway: avoid running JSF if all are available
+        skip = []
+        if prepared.weather:
+            skip.append(('weatherData',))
+        if prepared.fieldobs and field_observations is not None:
+            skip.append(prepared.fakeloc + ('fieldObservations',))
+        fake = default_instance(prepared.input_schema, skip)
+
+    if fake is None:
+        fake = prepared.faker.generate()
+        if check_default:
+            for k, v in fake.items():
+                fake[k] = set_default(v, prepared.input_schema['properties'][k])
+
+    if prepared.weather:
         if weather_data is None:
             weather_data = model_weather_data(model)
+        else:
+            check_weather_data(model, weather_data)
         fake['weatherData'] = weather_data
-        for w in ('start', 'end'):
+        daily = weather_requirements(model).interval > 3600
+        for w, time_key in (('start', 'timeStart'), ('end', 'timeEnd')):
             for bound in model['input']['weather_data_period_' + w]:
                 if bound['determined_by'] == 'INPUT_SCHEMA_PROPERTY':
                     d = fake
                     fields = bound['value'].split('.')
                     for field in fields[:-1]:
                         d = d[field]
-                    assert fields[
-                               -1] in d, 'weather_data_period_' + w + ' not found in input_schema properties, but refered in model input to be there (use FIXED _DATE instead)'
-                    d[fields[-1]] = weather_data['time' + w[0].upper() + w[1:]]
-                    if model['input']['weather_parameters'][0]['interval'] > 3600:
-                        d[fields[-1]] = d[fields[-1]][:10]  # datetime -> date
+                    if fields[-1] not in d:
+                        raise ValueError('weather_data_period_' + w + ' not found in input_schema properties, but refered in model input to be there (use FIXED _DATE instead)')
+                    # datetime -> date for daily data
+                    d[fields[-1]] = weather_data[time_key][:10] if daily else weather_data[time_key]
                     break
-    if fieldobs:
+    if prepared.fieldobs:
         d = fake
-        for prop in fakeloc:
+        for prop in prepared.fakeloc:
             d = d[prop]
         if field_observations is None:
             quantifications = [item['quantification'] for item in d['fieldObservations']]
@@ -366,4 +529,35 @@ def input_data(model, weather_data=None, field_observations=None, requires_all=T
 
     return fake
 
+
+def update_input(input_data, parameters):
+    """Copy of a model input with some of its properties replaced
+
+    Only the dicts along the replaced properties are copied, other values (e.g. weatherData) are shared with
+    input_data. This allows to cheaply derive inputs from a template (see input_data) when running a model with
+    varying parameters.
+
+    Parameters
+    ----------
+    input_data : dict
+        the template model input
+    parameters : dict
+        new values of properties, given by their path in the input, as in model input
+        (e.g. {'configParameters.timeZone': 'Europe/Paris'})
+
+    Returns
+    -------
+    dict
+        the updated model input
+    """
+    updated = dict(input_data)
+    for path, value in parameters.items():
+        d = updated
+        fields = path.split('.')
+        for field in fields[:-1]:
+            d[field] = dict(d[field])
+            d = d[field]
+        d[fields[-1]] = value
+    return updated
+
 # TODO: add interpreters for model meta for wralea
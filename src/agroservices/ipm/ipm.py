@@ -10,10 +10,23 @@
 
 ################## Interface Python IPM using Bioservice ########################################################
 
+import functools
+import gzip
 import json
+import os
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import deepcopy
 from pathlib import Path
+from types import MappingProxyType
 from typing import Union
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, it only speeds up json decoding
+    orjson = None
+
 import agroservices.ipm.fakers as fakers
 import agroservices.ipm.fixes as fixes
 from agroservices.ipm.datadir import datadir
@@ -21,6 +34,22 @@ from agroservices.services import REST
 
 __all__ = ["IPM"]
 
+json_loads = json.loads if orjson is None else orjson.loads
+
+
+def json_dumps(obj) -> bytes:
+    """Encode obj as json bytes, with orjson if available
+
+    Objects orjson cannot encode (e.g. float subclasses such as numpy.float64,
+    or integers larger than 64 bits) are encoded with json.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj).encode()
+
 
 def load_model(dssid, model):
     model = fixes.fix_prior_load_model(dssid, model)
@@ -37,6 +66,71 @@ def read_dss(dss):
     return dss
 
 
+def read_geojson(source):
+    """Get a copy of a weatherdata source, with its geoJSON string decoded
+
+    The (possibly large) geoJSON is decoded afresh rather than deep-copied,
+    which is several times faster.
+    """
+    spatial = source['spatial']
+    if not isinstance(spatial.get('geoJSON'), str):
+        return deepcopy(source)
+    res = deepcopy(dict(source, spatial=dict(spatial, geoJSON=None)))
+    res['spatial']['geoJSON'] = json_loads(spatial['geoJSON'])
+    return res
+
+
+def write_json(obj, path):
+    """Write obj in a json file, unless the file already has the same content
+
+    The file is replaced atomically, so that readers never see a partial file.
+    """
+    content = json.dumps(obj, indent=4)
+    if os.path.exists(path):
+        with open(path) as json_file:
+            if json_file.read() == content:
+                return
+    with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path),
+                                     suffix='.tmp', delete=False) as tmp:
+        tmp.write(content)
+    try:
+        os.chmod(tmp.name, 0o644)
+        os.replace(tmp.name, path)
+    except OSError:
+        os.remove(tmp.name)
+        raise
+
+
+def memoize_metadata(method=None, copy=True):
+    """Cache the result of an IPM metadata service for IPM.metadata_ttl seconds
+
+    Results are stored on the instance, per method and call arguments. Unless
+    copy is False, a deep copy is returned, so that callers can safely modify
+    it. Failed calls are not cached.
+    The decorated method accepts an extra use_cache keyword argument: if
+    False, the result is fetched again (and the cache refreshed).
+    Once expired, results are revalidated with conditional GET requests
+    (see REST.conditional_gets), so that unchanged ones are not downloaded again.
+    """
+    if method is None:
+        return functools.partial(memoize_metadata, copy=copy)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, use_cache=True, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        cached = self._metadata_cache.get(key)
+        if not use_cache or cached is None or cached[0] < time.time():
+            with self.conditional_gets():
+                res = method(self, *args, **kwargs)
+            if not isinstance(res, (dict, list)):
+                return res
+            cached = (time.time() + self.metadata_ttl, res)
+            self._metadata_cache[key] = cached
+        return deepcopy(cached[1]) if copy else cached[1]
+
+    return wrapper
+
+
 class IPM(REST):
     """
     Interface to the IPM  https://ipmdecisions.nibio.no/
@@ -55,6 +149,7 @@ class IPM(REST):
         WeatherAdaptaterService
         ------------------------
         >>> ipm.get_weatheradapter()
+        >>> ipm.get_weatheradapter_batch()
 
         WeatherDataService
         ------------------
@@ -82,8 +177,47 @@ class IPM(REST):
         >>> dss.get_schema_modeloutput() 
         >>> dss.post_schema_modeloutput_validate() 
         >>> ipm.post_schema_dss_yaml_validate() 
+
+        All metadata at once
+        --------------------
+        >>> ipm.bootstrap()
+
+        Run model
+        ---------
+        >>> ipm.run_model()
+        >>> ipm.run_models()
+        >>> ipm.run_model_sweep()
+        >>> ipm.submit_model()
     """
 
+    #: metadata services fetched by bootstrap
+    metadata_services = (
+        'get_parameter',
+        'get_qc',
+        'get_schema_weatherdata',
+        'get_weatherdatasource',
+        'get_crop',
+        'get_dss',
+        'get_pest',
+        'get_schema_dss',
+        'get_schema_fieldobservation',
+        'get_schema_modeloutput')
+
+    #: time (in seconds) during which metadata are served from memory,
+    #: before being revalidated against the platform
+    metadata_ttl = 86400
+
+    #: model runs do not change the platform state: they can be posted again
+    #: on gateway errors (but not on timeouts, see REST._mount_adapter)
+    RETRY_METHODS = REST.RETRY_METHODS | {'POST'}
+
+    #: headers of requests posting json data
+    _JSON_POST_HEADERS = MappingProxyType({"Content-Type": "application/json"})
+    _GZIP_JSON_POST_HEADERS = MappingProxyType({"Content-Type": "application/json",
+                                                "Content-Encoding": "gzip"})
+    #: size (in bytes) above which model inputs are compressed, if asked to
+    compress_min_size = 4096
+
     def __init__(self, name='IPM', url="https://platform.ipmdecisions.net",
                  callback=None, *args, **kwargs):
         """Constructor
@@ -92,21 +226,50 @@ class IPM(REST):
         ----------
         verbose : bool, optional
             set to False to prevent informative messages, by default False
+        requests_per_sec : int, optional
+            maximum number of requests started per second, by default 10.
+            It also bounds concurrent calls (see self.bootstrap, self.run_models)
         cache : bool, optional
-            Use cache, by default False
+            Use cache, by default False. If True, http responses are also
+            stored on disk, and persist across sessions
+
+        Notes
+        -----
+        Metadata (catalogues, schemas, dss and models descriptions) change
+        slowly on the platform: they are kept in memory for self.metadata_ttl
+        seconds (see self.clear_metadata_cache). Pass use_cache=False to a
+        metadata service (e.g. self.get_model) to fetch it again.
         """
         # hack ipmdecisions.net is down
         # url = 'https://ipmdecisions.nibio.no'
+        kwargs.setdefault('requests_per_sec', 10)
         super().__init__(
             name=name,
             url=url,
             *args, **kwargs)
 
         self.callback = callback  # use in all methods)
+        # headers are the same for all json requests, build them once
+        self._json_headers = MappingProxyType(self.get_headers(content='json'))
+        self._metadata_cache = {}
+        self._endpoint_cache = {}
+        self._executor = None  # see submit_model
+
+    def close(self):
+        """Wait for submitted model runs, and close the session"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        super().close()
+
+    def clear_metadata_cache(self):
+        """Forget all metadata kept in memory, forcing them to be revalidated against the platform"""
+        self._metadata_cache.clear()
 
     ########################## MetaDataService ##########################################
 
     # Parameters
+    @memoize_metadata
     def get_parameter(self) -> list:
         """Get a list of all the weather parameters defined in the platform
 
@@ -118,12 +281,13 @@ class IPM(REST):
         res = self.http_get(
             "api/wx/rest/parameter",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params={'callback': self.callback}
         )
         return res
 
     # QC
+    @memoize_metadata
     def get_qc(self) -> list:
         """Get a list of QC code
 
@@ -135,13 +299,14 @@ class IPM(REST):
         res = self.http_get(
             "api/wx/rest/qc",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params={'callback': self.callback}
         )
         return res
 
     # schema weather data
 
+    @memoize_metadata
     def get_schema_weatherdata(self) -> dict:
         """Get a schema that describes the IPM Decision platform's format for exchange of weather data
 
@@ -153,7 +318,7 @@ class IPM(REST):
         res = self.http_get(
             "api/wx/rest/schema/weatherdata",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params={'callback': self.callback}
         )
         return res
@@ -174,14 +339,11 @@ class IPM(REST):
         dict
             if the data is valid or not
         """
-        with open(jsonfile) as json_file:
-            data = json.load(json_file)
-
         res = self.http_post(
             "api/wx/rest/schema/weatherdata/validate",
             frmt='json',
-            data=json.dumps(data),
-            headers={"Content-Type": "application/json"}
+            data=Path(jsonfile).read_bytes(),
+            headers=self._JSON_POST_HEADERS
         )
         return res
 
@@ -216,8 +378,7 @@ class IPM(REST):
         if params is None:
             params = fakers.weather_adapter_params(source)
 
-        endpoint = source['endpoint'].format(
-            WEATHER_API_URL=self._url + '/api/wx')
+        endpoint = self._weatheradapter_endpoint(source)
 
         if not source['authentication_type'] == 'CREDENTIALS':
             res = self.http_get(endpoint, params=params, frmt='json')
@@ -227,12 +388,55 @@ class IPM(REST):
 
         return res
 
+    def get_weatheradapter_batch(self, source: dict, params_list: list,
+                                 credentials: dict = None,
+                                 max_workers: int = 8) -> list:
+        """Call weatheradapter service of a source for several sets of parameters
+
+        Calls are issued concurrently from a thread pool sharing the
+        connections of self.session. max_workers should not exceed
+        self.POOL_MAXSIZE, otherwise threads wait for a free connection.
+        Calls are still started at most self.requests_per_sec per second.
+
+        Parameters
+        ----------
+        source : dict
+            A meta_data dict of the source (see self.get_weatherdatasource)
+        params_list : list
+            a list of dict of formated parameters of the source weatheradapter service (see self.get_weatheradapter)
+        credentials : dict, optional
+            a dict of formated credential parameters
+        max_workers : int, optional
+            number of concurrent calls, by default 8
+
+        Returns
+        -------
+        list
+            formated weather data (see self.get_schema_weatherdata), in the order of params_list
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            res = executor.map(
+                lambda params: self.get_weatheradapter(source, params,
+                                                       credentials),
+                params_list)
+            return list(res)
+
+    def _weatheradapter_endpoint(self, source: dict) -> str:
+        """Get the (cached) url of the weatheradapter service of a source"""
+        key = (source['id'], source['endpoint'], self._url)
+        endpoint = self._endpoint_cache.get(key)
+        if endpoint is None:
+            endpoint = source['endpoint'].format(
+                WEATHER_API_URL=self._url + '/api/wx')
+            self._endpoint_cache[key] = endpoint
+        return endpoint
+
     ###################### WeatherDataService ##################################
 
     # weatherdatasource
 
     def get_weatherdatasource(self, source_id=None, access_type=None,
-                              authentication_type=None) -> list:
+                              authentication_type=None, use_cache=True) -> list:
         """Access a dict of available wetherdata sources, of a source referenced by its id
 
         Parameters
@@ -243,6 +447,8 @@ class IPM(REST):
             Filter datasource that are different from access_type
         authentication_type : str [optional]
             Filter datasource that are different from authentication_type
+        use_cache : bool [optional]
+            if False, the sources are fetched again from the platform, by default True
 
         Returns
         -------
@@ -250,21 +456,7 @@ class IPM(REST):
            wetherdata sources available on the platform if source_id is None
            The weatherdatatsource metadata referenced by source_id otherwise
         """
-        res = self.http_get(
-            "api/wx/rest/weatherdatasource",
-            frmt='json',
-            headers=self.get_headers(content='json'),
-            params={'callback': self.callback}
-        )
-
-        for r in res:
-            if 'geoJSON' in r['spatial']:
-                if r['spatial']['geoJSON'] is not None:
-                    r['spatial']['geoJSON'] = json.loads(
-                        r['spatial']['geoJSON'])
-
-        sources = {item['id']: item for item in res}
-        sources = fixes.fix_get_weatherdatasource(sources)
+        sources = self._get_weatherdatasources(use_cache=use_cache)
 
         if source_id is None:
             res = sources
@@ -274,14 +466,31 @@ class IPM(REST):
             if authentication_type is not None:
                 res = {k: v for k, v in res.items() if
                        v['authentication_type'] == authentication_type}
-            return res
+            return {k: read_geojson(v) for k, v in res.items()}
         elif source_id in sources:
-            return sources[source_id]
+            return read_geojson(sources[source_id])
         else:
             raise ValueError(
                 "datasource error: source_id is not referencing a valid datasource: %s" % (
                     ','.join(sources.keys())))
 
+    @memoize_metadata(copy=False)
+    def _get_weatherdatasources(self) -> dict:
+        """Get the {source_id: source} dict of all weatherdata sources
+
+        The (possibly large) geoJSON strings are kept undecoded, see read_geojson.
+        The returned dict is shared by all calls and should not be modified.
+        """
+        res = self.http_get(
+            "api/wx/rest/weatherdatasource",
+            frmt='json',
+            headers=self._json_headers,
+            params={'callback': self.callback}
+        )
+
+        sources = {item['id']: item for item in res}
+        return fixes.fix_get_weatherdatasource(sources)
+
     def post_weatherdatasource_location(
             self,
             tolerance: Union[int, float] = 0,
@@ -306,15 +515,12 @@ class IPM(REST):
             tolerance=tolerance
         )
 
-        with open(geoJsonfile) as json_file:
-            data = json.load(json_file)
-
         res = self.http_post(
             "api/wx/rest/weatherdatasource/location",
             frmt='json',
-            data=json.dumps(data),
+            data=Path(geoJsonfile).read_bytes(),
             params=params,
-            headers={"Content-Type": "application/json"}
+            headers=self._JSON_POST_HEADERS
 
         )
 
@@ -352,7 +558,7 @@ class IPM(REST):
         res = self.http_get(
             "api/wx/rest/weatherdatasource/location/point",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params=params
         )
 
@@ -360,6 +566,7 @@ class IPM(REST):
 
     ###########################   DSSService  ################################################
 
+    @memoize_metadata
     def get_crop(self) -> list:
         """Get a list of EPPO codes for all crops that the DSS models in plateform
 
@@ -371,11 +578,12 @@ class IPM(REST):
         res = self.http_get(
             "api/dss/rest/crop",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params={'callback': self.callback}
         )
         return res
 
+    @memoize_metadata
     def get_pest(self) -> list:
         """Get A list of EPPO codes https://www.eppo.int/RESOURCES/eppo_databases/eppo_codes) for all pests that the DSS models in the platform deals with in some way.
 
@@ -387,31 +595,26 @@ class IPM(REST):
         res = self.http_get(
             "api/dss/rest/pest",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params={'callback': self.callback}
         )
         return res
 
-    def get_dss(self, execution_type=None) -> dict:
+    def get_dss(self, execution_type=None, use_cache=True) -> dict:
         """Get a {dss_id: dss} dict of all DSSs and models available in the platform
 
         Parameters
         ----------
         execution_type ('LINK' or 'ONTHEFLY') :filter results by execution types, optional
+        use_cache : bool, optional
+            if False, DSSs are fetched again from the platform, by default True
 
         Returns
         -------
         dict
             dict all DSSs and models available in the platform
         """
-        res = self.http_get(
-            "api/dss/rest/dss",
-            frmt='json',
-            headers=self.get_headers(content='json'),
-            params={'callback': self.callback}
-        )
-
-        all_dss = {dss["id"]: read_dss(dss) for dss in res}
+        all_dss = self._get_all_dss(use_cache=use_cache)
 
         if execution_type is not None:
             filtered = {}
@@ -419,11 +622,25 @@ class IPM(REST):
                 models = {k: v for k, v in dss['models'].items() if
                           v['execution']['type'] == execution_type}
                 if len(models) > 0:
-                    dss['models'] = models
-                    filtered[id] = dss
-            return filtered
+                    filtered[id] = dict(dss, models=models)
+            return deepcopy(filtered)
         else:
-            return all_dss
+            return deepcopy(all_dss)
+
+    @memoize_metadata(copy=False)
+    def _get_all_dss(self) -> dict:
+        """Get the {dss_id: dss} dict of all DSSs, with models loaded
+
+        The returned dict is shared by all calls and should not be modified.
+        """
+        res = self.http_get(
+            "api/dss/rest/dss",
+            frmt='json',
+            headers=self._json_headers,
+            params={'callback': self.callback}
+        )
+
+        return {dss["id"]: read_dss(dss) for dss in res}
 
     def post_dss_location(
             self,
@@ -440,17 +657,15 @@ class IPM(REST):
         list
             A list of all the matching DSS models
         """
-        with open(geoJsonfile) as json_file:
-            data = json.load(json_file)
-
         res = self.http_post(
             "api/dss/rest/dss/location",
             frmt='json',
-            data=json.dumps(data),
-            headers={"Content-Type": "application/json"}
+            data=Path(geoJsonfile).read_bytes(),
+            headers=self._JSON_POST_HEADERS
         )
         return res
 
+    @memoize_metadata
     def get_dssId(
             self,
             DSSId: str = 'no.nibio.vips') -> dict:
@@ -467,12 +682,13 @@ class IPM(REST):
             informations about a specific DSS
         """
         res = self.http_get(
-            "api/dss/rest/dss/{}".format(DSSId),
+            f"api/dss/rest/dss/{DSSId}",
             frmt='json'
         )
 
         return read_dss(res)
 
+    @memoize_metadata
     def get_cropCode(
             self,
             cropCode: str = 'SOLTU') -> dict:
@@ -489,7 +705,7 @@ class IPM(REST):
             all informations about  DSS corresponding of cropCode
         """
         res = self.http_get(
-            "api/dss/rest/dss/crop/{}".format(cropCode),
+            f"api/dss/rest/dss/crop/{cropCode}",
             frmt='json'
         )
 
@@ -523,12 +739,13 @@ class IPM(REST):
         res = self.http_get(
             "api/dss/rest/dss/location/point",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params=params
         )
 
         return {dss["id"]: read_dss(dss) for dss in res}
 
+    @memoize_metadata
     def get_pestCode(
             self,
             pestCode: str = 'PSILRO') -> dict:
@@ -545,12 +762,13 @@ class IPM(REST):
             list of DSS (and corresponding models) that are applicable to the given pest
         """
         res = self.http_get(
-            'api/dss/rest/dss/pest/{}'.format(pestCode),
+            f'api/dss/rest/dss/pest/{pestCode}',
             frmt='json'
         )
 
         return {dss["id"]: read_dss(dss) for dss in res}
 
+    @memoize_metadata
     def get_model(
             self,
             DSSId: str = 'no.nibio.vips',
@@ -570,13 +788,14 @@ class IPM(REST):
             All information of DSS model
         """
         res = self.http_get(
-            "api/dss/rest/model/{}/{}".format(DSSId, ModelId),
+            f"api/dss/rest/model/{DSSId}/{ModelId}",
             frmt='json'
         )
         res = load_model(DSSId, res)
 
         return res
 
+    @memoize_metadata
     def get_input_schema(
             self,
             DSSId: str = 'no.nibio.vips',
@@ -596,7 +815,7 @@ class IPM(REST):
             The inputs Json schema for the DSS model
         """
         res = self.http_get(
-            "api/dss/rest/model/{}/{}/input_schema".format(DSSId, ModelId),
+            f"api/dss/rest/model/{DSSId}/{ModelId}/input_schema",
             frmt='json'
         )
 
@@ -604,6 +823,7 @@ class IPM(REST):
 
     ###############################  DSSMetaDataService ##############################################
 
+    @memoize_metadata
     def get_schema_dss(
             self) -> dict:
         """Provides schemas and validation thereof
@@ -616,12 +836,13 @@ class IPM(REST):
         res = self.http_get(
             "api/dss/rest/schema/dss",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params={'callback': self.callback}
         )
 
         return res
 
+    @memoize_metadata
     def get_schema_fieldobservation(
             self) -> dict:
         """Get the generic schema for field observations, containing the common properties for field observations. 
@@ -637,12 +858,13 @@ class IPM(REST):
         res = self.http_get(
             "api/dss/rest/schema/fieldobservation",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params={'callback': self.callback}
         )
 
         return res
 
+    @memoize_metadata
     def get_schema_modeloutput(self) -> dict:
         """Get The Json Schema for the platform's standard for DSS model output
 
@@ -654,7 +876,7 @@ class IPM(REST):
         res = self.http_get(
             "api/dss/rest/schema/modeloutput",
             frmt='json',
-            headers=self.get_headers(content='json'),
+            headers=self._json_headers,
             params={'callback': self.callback}
         )
 
@@ -675,14 +897,11 @@ class IPM(REST):
         dict
             if the data is valid or not
         """
-        with open(jsonfile) as json_file:
-            data = json.load(json_file)
-
         res = self.http_post(
             "api/dss/rest/schema/modeloutput/validate",
             frmt='json',
-            data=json.dumps(data),
-            headers={"Content-Type": "application/json"}
+            data=Path(jsonfile).read_bytes(),
+            headers=self._JSON_POST_HEADERS
         )
 
         return res
@@ -692,6 +911,8 @@ class IPM(REST):
             yamlfile: Union[str, Path] = 'test_yaml_validate.yaml') -> dict:
         """Validate DSS YAML description file, using this Json schema: https://ipmdecisions.nibio.no/api/dss/rest/schema/dss
 
+        The description is converted to json before being posted (requires pyyaml)
+
         Parameters
         ----------
         yamlfile : Union[str,Path], optional
@@ -702,51 +923,87 @@ class IPM(REST):
         dict
             if the data is valid or not
         """
+        import yaml
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
         with open(yamlfile) as yaml_file:
-            data = yaml.load(yaml_file, Loader=yaml.FullLoader)
+            data = yaml.load(yaml_file, Loader=loader)
 
         res = self.http_post(
-            "api/dss/rest/schema/modeloutput/validate",
+            "api/dss/rest/schema/dss/validate",
             frmt="json",
-            data=yaml.dump(data),
-            headers={"Content-Type": "application/json"}
+            data=json_dumps(data),
+            headers=self._JSON_POST_HEADERS
         )
 
         return res
 
+    def bootstrap(self, max_workers: int = 10) -> dict:
+        """Fetch all platform metadata concurrently
+
+        The metadata services are independent, so they are issued from a
+        thread pool sharing the connections of self.session: total time is
+        close to the slowest call rather than to the sum of all of them.
+        Requests are still started at most self.requests_per_sec per second,
+        so that fast calls take at least len(self.metadata_services) / self.requests_per_sec seconds.
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            number of concurrent requests, by default 10
+
+        Returns
+        -------
+        dict
+            a {service_name: result} dict for all services listed in self.metadata_services
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {name: executor.submit(getattr(self, name)) for name in
+                       self.metadata_services}
+        return {name: future.result() for name, future in futures.items()}
+
     ###############################  Run model ##############################################
 
     def write_weatherdata_schema(self):
         schema = self.get_schema_weatherdata()
-        json_object = json.dumps(schema, indent=4)
-        with open(datadir + "schema_weatherdata.json", "w") as outfile:
-            outfile.write(json_object)
+        write_json(schema, os.path.join(datadir, "schema_weatherdata.json"))
 
     def write_fieldobservation_schema(self):
         schema = self.get_schema_fieldobservation()
-
-        json_object = json.dumps(schema, indent=4)
-        with open(datadir + "schema_fieldobservation.json", "w") as outfile:
-            outfile.write(json_object)
+        write_json(schema, os.path.join(datadir, "schema_fieldobservation.json"))
 
     def run_model(
             self,
             model: dict,
-            input_data: dict = None,
-            timeout=None):
+            input_data: Union[dict, str, bytes] = None,
+            timeout=None,
+            compress: bool = False):
         """Run Dss Model and get output
 
         Parameters
         ----------
         model : dict
             The model meta_data dict (see self.get_model)
-        input_data : dict, optional
-            A dict with all inputs as defined in model input schema (see agroservices.ipm.fakers.input_data for generation)
+        input_data : dict, str or bytes, optional
+            A dict with all inputs as defined in model input schema (see agroservices.ipm.fakers.input_data for generation).
+            Already serialised inputs (json str or bytes, e.g. read from a file) are posted as is.
+        timeout : float, optional
+            time (in seconds) to wait for the model output, by default no timeout
+        compress : bool, optional
+            if True, inputs larger than self.compress_min_size bytes are sent gzip compressed.
+            This saves upload time for large weather data, but requires the DSS server to support it.
+            By default False
 
         Returns
         -------
         dict
             output of model
+
+        Notes
+        -----
+        Successive runs reuse the keep-alive connections of self.session,
+        so that only the first run on a DSS server pays the TLS handshake.
+        When running a model many times, fetch it once with self.get_model
+        (which is cached anyway) and pass the same dict to all runs.
         """
         if input_data is None:
             input_data = fakers.input_data(model)
@@ -760,20 +1017,130 @@ class IPM(REST):
 
         endpoint = model['execution']['endpoint']
 
-        if timeout is not None:
-            res = self.http_post(
-                endpoint,
-                frmt='json',
-                data=json.dumps(input_data),
-                headers={"Content-Type": "application/json"},
-                timeout=timeout
-            )
+        if isinstance(input_data, str):
+            data = input_data.encode()
+        elif isinstance(input_data, bytes):
+            data = input_data
         else:
-            res = self.http_post(
-                endpoint,
-                frmt='json',
-                data=json.dumps(input_data),
-                headers={"Content-Type": "application/json"}
-            )
+            data = json_dumps(input_data)
+        headers = self._JSON_POST_HEADERS
+        if compress and len(data) > self.compress_min_size:
+            data = gzip.compress(data, compresslevel=1)
+            headers = self._GZIP_JSON_POST_HEADERS
+
+        kwargs = {} if timeout is None else {'timeout': timeout}
+        res = self.http_post(
+            endpoint,
+            frmt='json',
+            data=data,
+            headers=headers,
+            **kwargs
+        )
 
         return res
+
+    def run_models(
+            self,
+            model: dict,
+            inputs: list,
+            timeout=None,
+            max_workers: int = 8,
+            compress: bool = False) -> list:
+        """Run a Dss Model for several inputs
+
+        Runs are posted concurrently from a thread pool sharing the
+        connections of self.session. max_workers should not exceed
+        self.POOL_MAXSIZE, otherwise threads wait for a free connection.
+        Runs are still started at most self.requests_per_sec per second, so
+        that fast runs take at least len(inputs) / self.requests_per_sec seconds.
+
+        Parameters
+        ----------
+        model : dict
+            The model meta_data dict (see self.get_model)
+        inputs : list
+            A list of input_data (see self.run_model). None items are replaced by fake inputs
+        max_workers : int, optional
+            number of concurrent runs, by default 8
+        timeout, compress :
+            see self.run_model
+
+        Returns
+        -------
+        list
+            outputs of model, in the order of inputs
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            res = executor.map(
+                lambda input_data: self.run_model(model, input_data, timeout,
+                                                  compress),
+                inputs)
+            return list(res)
+
+    def run_model_sweep(
+            self,
+            model: dict,
+            parameters_list: list,
+            input_data: dict = None,
+            weather_data: dict = None,
+            timeout=None,
+            max_workers: int = 8,
+            compress: bool = False) -> list:
+        """Run a Dss Model for several sets of parameters
+
+        Inputs are derived from a single template input, so that the input
+        schema is walked only once and weather data are shared by all runs
+        (see agroservices.ipm.fakers.update_input).
+
+        Parameters
+        ----------
+        model : dict
+            The model meta_data dict (see self.get_model)
+        parameters_list : list
+            A list of dict, mapping property paths in the input to their values
+            (e.g. [{'configParameters.timeZone': 'Europe/Paris'}, ...])
+        input_data : dict, optional
+            The template input, by default generated with agroservices.ipm.fakers.input_data
+        weather_data : dict, optional
+            weather data used to generate the template input, if input_data is None
+        timeout, max_workers, compress :
+            see self.run_models
+
+        Returns
+        -------
+        list
+            outputs of model, in the order of parameters_list
+        """
+        if input_data is None:
+            input_data = fakers.input_data(model, weather_data=weather_data)
+        inputs = [fakers.update_input(input_data, parameters)
+                  for parameters in parameters_list]
+        return self.run_models(model, inputs, timeout=timeout,
+                               max_workers=max_workers, compress=compress)
+
+    def submit_model(
+            self,
+            model: dict,
+            input_data: dict = None,
+            timeout=None,
+            compress: bool = False) -> Future:
+        """Run a Dss Model in the background
+
+        Runs are executed by a thread pool of self.POOL_MAXSIZE workers, shared
+        by all submissions, so that several runs can be in flight without
+        waiting for each other. Runs are still started at most
+        self.requests_per_sec per second.
+
+        Parameters
+        ----------
+        see self.run_model
+
+        Returns
+        -------
+        concurrent.futures.Future
+            the future output of model (see self.run_model)
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.POOL_MAXSIZE)
+        return self._executor.submit(self.run_model, model, input_data, timeout,
+                                     compress)
@@ -24,6 +24,8 @@ import os
 import sys
 import time
 import platform
+import threading
+import contextlib
 import traceback
 
 from .settings import AgroServicesConfig
@@ -141,22 +143,18 @@ class Service(object):
         self.settings = AgroServicesConfig()
 
         self._last_call = 0
+        # calls may be issued from several threads (see IPM.bootstrap)
+        self._calls_lock = threading.Lock()
 
     def _calls(self):
-        time_lapse = 1. / self.requests_per_sec
-        current_time = time.time()
-        dt = current_time - self._last_call
-        
-        if self._last_call == 0:
-            self._last_call = current_time
-            return
-        else:
-            self._last_call = current_time
-            if dt > time_lapse:
-                return
-            else:
-                time.sleep(time_lapse - dt)
-        
+        # book the next call slot under the lock, but wait outside of it
+        with self._calls_lock:
+            time_lapse = 1. / self.requests_per_sec
+            current_time = time.time()
+            call_time = max(current_time, self._last_call + time_lapse)
+            self._last_call = call_time
+        if call_time > current_time:
+            time.sleep(call_time - current_time)
 
 
     def _get_caching(self):
@@ -364,7 +362,18 @@ class RESTbase(Service):
 
 import requests         # replacement for urllib2 (2-3 times faster)
 from requests.models import Response
+from urllib3.util.retry import Retry
+try:
+    _RETRY_DEFAULT_METHODS = Retry.DEFAULT_ALLOWED_METHODS
+    _RETRY_METHODS_KEYWORD = 'allowed_methods'
+except AttributeError:  # urllib3 < 1.26
+    _RETRY_DEFAULT_METHODS = Retry.DEFAULT_METHOD_WHITELIST
+    _RETRY_METHODS_KEYWORD = 'method_whitelist'
 import requests_cache   # use caching wihh requests
+try:
+    import orjson       # optional, faster decoding of json responses
+except ImportError:
+    orjson = None
 #import grequests        # use asynchronous requests with gevent
 # Note that grequests should be imported after requests_cache. Otherwise,
 # one should use a session instance when calling grequests.get, which we do
@@ -454,6 +463,18 @@ class REST(RESTbase):
     }
     #special_characters = ['/', '#', '+']
 
+    #: number of per-host connection pools and connections kept alive in each
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 20
+
+    #: if True, all GET requests revalidate previous responses (see
+    #: _conditional_get). Otherwise, only those issued in a
+    #: conditional_gets context do.
+    CONDITIONAL_GET = False
+
+    #: HTTP methods retried on connection errors and transient gateway errors
+    RETRY_METHODS = _RETRY_DEFAULT_METHODS
+
     def __init__(self, name, url=None, verbose=True, cache=False,
         requests_per_sec=3, proxies=[], cert=None, url_defined_later=False):
         super(REST, self).__init__(name, url, verbose=verbose,
@@ -466,6 +487,9 @@ class REST(RESTbase):
         self.CACHE_NAME = bspath + os.sep + self.name + "_agroservices_db"
 
         self._session = None
+        self._validated_responses = {}
+        # per thread options of requests (see conditional_gets)
+        self._local = threading.local()
 
         self.settings.params['cache.on'][0] = cache
 
@@ -519,12 +543,31 @@ class REST(RESTbase):
         """
         self.logging.debug("Creating session (uncached version)")
         self._session = requests.Session()
-        adapter = requests.adapters.HTTPAdapter(max_retries=self.settings.MAX_RETRIES)
-        #, pool_block=True does not work with asynchronous requests
-        self._session.mount('http://', adapter)
-        self._session.mount('https://', adapter)
+        self._mount_adapter(self._session)
         return self._session
 
+    def _mount_adapter(self, session):
+        """Mount a pooled, keep-alive HTTPAdapter on session
+
+        Connections are reused across calls, so that only the first request
+        to a host pays the TCP/TLS handshake. Transient gateway errors are
+        retried with a small exponential backoff.
+        If POST is retried, read errors (e.g. timeouts) are not: the server
+        may still be processing the request.
+        """
+        retries = Retry(total=self.settings.MAX_RETRIES, backoff_factor=0.2,
+                        read=False if 'POST' in self.RETRY_METHODS else None,
+                        status_forcelist=[502, 503, 504],
+                        raise_on_status=False,
+                        **{_RETRY_METHODS_KEYWORD: self.RETRY_METHODS})
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=retries)
+        #, pool_block=True does not work with asynchronous requests
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
     def _create_cache_session(self):
         """Creates a cached session using requests_cache package"""
         self.logging.debug("Creating session (cache version)")
@@ -533,8 +576,24 @@ class REST(RESTbase):
             self.logging.debug("No cached session created yet. Creating one")
             self._session = requests_cache.CachedSession(self.CACHE_NAME,
                          backend='sqlite', fast_save=self.settings.FAST_SAVE)
+            self._mount_adapter(self._session)
         return self._session
 
+    def close(self):
+        """Close the session, releasing the pooled connections
+
+        A new session is created on next request if needed.
+        """
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
     def _get_timeout(self):
         return self.settings.TIMEOUT
     def _set_timeout(self, value):
@@ -560,6 +619,11 @@ class REST(RESTbase):
             self.logging.warning("status is not ok with {0}".format(reason))
             return res.status_code
         if frmt == "json":
+            if orjson is not None:
+                try:
+                    return orjson.loads(res.content)
+                except orjson.JSONDecodeError:
+                    pass
             try:
                 return res.json()
             except:
@@ -662,7 +726,10 @@ class REST(RESTbase):
                 kargs['auth'] = self.authentication
 
             #res = self.session.get(url, **{'timeout':self.TIMEOUT, 'params':params})
-            res = self.session.get(url, **kargs)
+            if self.CONDITIONAL_GET or getattr(self._local, 'conditional_get', False):
+                res = self._conditional_get(url, **kargs)
+            else:
+                res = self.session.get(url, **kargs)
 
             self.last_response = res
             res = self._interpret_returned_request(res, frmt)
@@ -677,6 +744,53 @@ class REST(RESTbase):
             self.logging.critical("""Query unsuccesful. Maybe too slow response.
     Consider increasing it with settings.TIMEOUT attribute {}""".format(self.settings.TIMEOUT))
 
+    @contextlib.contextmanager
+    def conditional_gets(self):
+        """Context in which GET requests of the current thread revalidate previous responses
+
+        Use it for resources that are requested repeatedly, but change
+        rarely (see _conditional_get): responses are kept in memory.
+        """
+        previous = getattr(self._local, 'conditional_get', False)
+        self._local.conditional_get = True
+        try:
+            yield
+        finally:
+            self._local.conditional_get = previous
+
+    def _conditional_get(self, url, **kargs):
+        """GET url, revalidating the previous response to the same request if any
+
+        Responses carrying an ETag or a Last-Modified header are kept in
+        memory. The next identical request is sent with If-None-Match /
+        If-Modified-Since headers and, if the server answers 304 (Not
+        Modified), the kept response is returned: its body is not downloaded
+        again.
+        """
+        try:
+            key = (url, tuple(sorted((kargs.get('params') or {}).items())))
+            hash(key)
+        except TypeError:
+            return self.session.get(url, **kargs)
+
+        cached = self._validated_responses.get(key)
+        if cached is not None:
+            headers = dict(kargs.get('headers') or {})
+            if 'ETag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['ETag']
+            if 'Last-Modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['Last-Modified']
+            kargs['headers'] = headers
+
+        res = self.session.get(url, **kargs)
+        if res.status_code == 304 and cached is not None:
+            self.logging.debug("Not modified, reusing previous response")
+            return cached
+        if res.status_code == 200 and ('ETag' in res.headers or
+                                       'Last-Modified' in res.headers):
+            self._validated_responses[key] = res
+        return res
+
     def http_post(self, query, params=None, data=None,
                     frmt='xml', headers=None, files=None, content=None, **kargs):
         # query and frmt are agroservices parameters. Others are post parameters
@@ -750,6 +864,7 @@ class REST(RESTbase):
         headers['User-Agent'] = self.getUserAgent()
         headers['Accept'] = self.content_types[content]
         headers['Content-Type'] = self.content_types[content]
+        headers['Connection'] = 'keep-alive'
         #"application/json;odata=verbose" required in reactome
         #headers['Content-Type'] = "application/json;odata=verbose" required in reactome
         return headers
@@ -1,6 +1,10 @@
 import json
 from urllib.request import urlopen
+
+import requests
+
 from agroservices.ipm.ipm import IPM
+from agroservices.services import _RETRY_METHODS_KEYWORD
 from agroservices.ipm.datadir import datadir
 import agroservices.ipm.fakers as fakers
 
@@ -21,6 +25,23 @@ if test_url():
 
 def keys_exists(dict_, keys, test = all):
     return test(key in dict_ for key in keys)
+
+
+def test_session():
+    with IPM() as ipm:
+        session = ipm.session
+        assert ipm.session is session
+        assert session.get_adapter(ipm.url).poolmanager.connection_pool_kw['maxsize'] == ipm.POOL_MAXSIZE
+        retries = session.get_adapter(ipm.url).max_retries
+        assert 'POST' in getattr(retries, _RETRY_METHODS_KEYWORD)
+    assert ipm._session is None
+
+
+def test_compression():
+    ipm = IPM()
+    request = requests.Request('GET', ipm.url, headers=ipm.get_headers(content='json'))
+    headers = ipm.session.prepare_request(request).headers
+    assert 'gzip' in headers['Accept-Encoding']
     
 
 ################# MetaDataService ################################# 
@@ -98,6 +119,21 @@ def test_get_weatheradapter():
 
 
 
+def test_get_weatheradapter_batch():
+    ipm = IPM()
+    source = ipm.get_weatherdatasource('no.nibio.lmt')
+    params_list = [dict(weatherStationId=5,
+                        parameters='1002,2001,3002,3101',
+                        interval=3600,
+                        timeStart='2020-05-0%dT00:00:00+02:00' % day,
+                        timeEnd='2020-05-0%dT00:00:00+02:00' % (day + 1))
+                   for day in (1, 2, 3)]
+    res = ipm.get_weatheradapter_batch(source, params_list)
+    assert len(res) == 3
+    assert all(type(r) is dict for r in res)
+    assert [r['timeStart'] for r in res] == ['2020-04-30T22:00:00Z', '2020-05-01T22:00:00Z', '2020-05-02T22:00:00Z']
+
+
 #################### WeatherDataService #########################################
 
 def test_get_weatherdatasource():
@@ -207,9 +243,69 @@ def test_run_model():
     res = ipm.run_model(model, model_input)
     assert isinstance(res, dict)
     assert 'locationResult' in res
+    # serialised input
+    with open(path, "rb") as json_file:
+        res = ipm.run_model(model, json_file.read())
+    assert isinstance(res, dict)
+    assert 'locationResult' in res
     # fake input
     input_data = fakers.input_data(model)
     res = ipm.run_model(model, input_data)
     assert isinstance(res, dict)
     assert 'locationResult' in res
 
+
+def test_bootstrap():
+    ipm = IPM()
+    res = ipm.bootstrap()
+    assert set(res) == set(ipm.metadata_services)
+    assert type(res['get_parameter']) is list
+    assert type(res['get_dss']) is dict
+
+def test_metadata_cache():
+    ipm = IPM()
+    res = ipm.get_crop()
+    res.append('FOO')
+    again = ipm.get_crop()
+    assert 'FOO' not in again
+    assert len(ipm._metadata_cache) == 1
+    model = ipm.get_model(DSSId='no.nibio.vips', ModelId='PSILARTEMP')
+    assert ipm.get_model(DSSId='no.nibio.vips', ModelId='PSILARTEMP',
+                         use_cache=False) == model
+    assert len(ipm._metadata_cache) == 2
+    ipm.clear_metadata_cache()
+    assert len(ipm._metadata_cache) == 0
+
+def test_post_schema_dss_yaml_validate():
+    ipm = IPM()
+    res = ipm.post_schema_dss_yaml_validate(yamlfile=datadir + 'test_yaml_validate.yaml')
+    assert type(res) is dict
+
+def test_run_models():
+    ipm = IPM()
+    model = ipm.get_model(DSSId='no.nibio.vips',ModelId='PSILARTEMP')
+    path = datadir + 'model_input_psilartemp.json'
+    with open(path) as json_file:
+        model_input = json.load(json_file)
+    res = ipm.run_models(model, [model_input, None])
+    assert len(res) == 2
+    assert all(isinstance(r, dict) for r in res)
+    assert all('locationResult' in r for r in res)
+
+def test_run_model_sweep():
+    ipm = IPM()
+    model = ipm.get_model(DSSId='no.nibio.vips',ModelId='PSILARTEMP')
+    path = datadir + 'model_input_psilartemp.json'
+    with open(path) as json_file:
+        model_input = json.load(json_file)
+    parameters_list = [{'configParameters.timeEnd': end} for end in ('2020-05-02', '2020-05-03')]
+    res = ipm.run_model_sweep(model, parameters_list, input_data=model_input)
+    assert len(res) == 2
+    assert all('locationResult' in r for r in res)
+
+def test_submit_model():
+    with IPM() as ipm:
+        model = ipm.get_model(DSSId='no.nibio.vips',ModelId='PSILARTEMP')
+        futures = [ipm.submit_model(model) for _ in range(2)]
+        res = [future.result() for future in futures]
+    assert all('locationResult' in r for r in res)
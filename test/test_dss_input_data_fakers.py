@@ -64,3 +64,14 @@ def test_faker_dss_onthefly_field(dss, model):
     assert len(m['execution']['input_schema']) > 0
     fake = ipm_fakers.input_data(m)
     assert isinstance(fake, dict)
+
+
+@pytest.mark.parametrize('dss,model', weather_nofield)
+def test_faker_dss_onthefly_weather_check(dss, model):
+    m = onthefly[dss]['models'][model]
+    weather_data = ipm_fakers.model_weather_data(m)
+    fake = ipm_fakers.input_data(m, weather_data=weather_data)
+    assert fake['weatherData'] is weather_data
+    weather_data['weatherParameters'] = weather_data['weatherParameters'][1:]
+    with pytest.raises(ValueError):
+        ipm_fakers.input_data(m, weather_data=weather_data)
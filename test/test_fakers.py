@@ -0,0 +1,134 @@
+"""Offline tests of input data fakers, on synthetic models"""
+import datetime
+
+import pytest
+
+from agroservices.ipm import fakers as ipm_fakers
+
+
+def make_schema():
+    return {'type': 'object',
+            'required': ['configParameters'],
+            'properties': {
+                'modelId': {'type': 'string', 'default': 'TEST'},
+                'configParameters': {
+                    'type': 'object',
+                    'required': [],
+                    'properties': {
+                        'timeZone': {'type': 'string', 'default': 'Europe/Oslo'},
+                        'threshold': {'type': 'number', 'default': 10},
+                        'timeStart': {'type': 'string', 'default': '{CURRENT_YEAR}-03-01'}}}}}
+
+
+def make_model(schema, weather=False, fieldobs=False):
+    model = {'id': 'TEST', 'version': '1.0', 'pests': ['PSILRO'], 'crops': ['DAUCS'],
+             'execution': {'type': 'ONTHEFLY', 'input_schema': schema},
+             'input': None}
+    if weather or fieldobs:
+        fixed = [{'determined_by': 'FIXED_DATE', 'value': '2020-03-01'}]
+        model['input'] = {
+            'weather_parameters': [{'parameter_code': 1001, 'interval': 3600}] if weather else None,
+            'field_observation': {'pests': ['PSILRO']} if fieldobs else None,
+            'weather_data_period_start': fixed,
+            'weather_data_period_end': fixed}
+    return model
+
+
+def test_default_instance():
+    model = make_model(make_schema())
+    prepared = ipm_fakers.prepare_input_schema(model)
+    expected = prepared.faker.generate()
+    for k, v in expected.items():
+        expected[k] = ipm_fakers.set_default(v, prepared.input_schema['properties'][k])
+    fake = ipm_fakers.input_data(model)
+    assert fake == expected
+    assert fake['configParameters']['threshold'] == 10.
+    assert fake['configParameters']['timeStart'] == '%d-03-01' % datetime.datetime.now().year
+
+
+def test_default_instance_missing_default():
+    schema = make_schema()
+    del schema['properties']['configParameters']['properties']['threshold']['default']
+    model = make_model(schema)
+    prepared = ipm_fakers.prepare_input_schema(model)
+    assert ipm_fakers.default_instance(prepared.input_schema) is None
+    # fallback to JSF
+    fake = ipm_fakers.input_data(model)
+    assert isinstance(fake['configParameters']['threshold'], float)
+    assert fake['configParameters']['timeZone'] == 'Europe/Oslo'
+
+
+def test_default_instance_skip(monkeypatch):
+    schema = make_schema()
+    schema['properties']['weatherData'] = {'type': 'object'}
+    schema['properties']['fieldObservations'] = {
+        'type': 'array',
+        'items': {'type': 'object',
+                  'properties': {'fieldObservation': {'type': 'object'},
+                                 'quantification': {'type': 'object',
+                                                    'properties': {'trapCount': {'type': 'integer'}}}}}}
+    model = make_model(schema, weather=True, fieldobs=True)
+    prepared = ipm_fakers.prepare_input_schema(model)
+    assert prepared.weather and prepared.fieldobs
+    assert ipm_fakers.default_instance(prepared.input_schema) is None
+    skip = [('weatherData',), ('fieldObservations',)]
+    instance = ipm_fakers.default_instance(prepared.input_schema, skip)
+    assert instance['weatherData'] is None
+    assert instance['fieldObservations'] is None
+
+    def generate():
+        raise AssertionError('JSF should not be used')
+    monkeypatch.setattr(prepared.faker, 'generate', generate)
+    weather_data = {'interval': 3600, 'weatherParameters': [1001],
+                    'timeStart': '2020-03-01T00:00:00+01:00', 'timeEnd': '2020-03-02T00:00:00+01:00'}
+    field_observations = ipm_fakers.model_field_observations(model, [{'trapCount': 1}])
+    fake = ipm_fakers.input_data(model, weather_data=weather_data, field_observations=field_observations)
+    assert fake['weatherData'] is weather_data
+    assert fake['fieldObservations'] is field_observations
+    assert fake['configParameters']['timeZone'] == 'Europe/Oslo'
+
+
+def test_update_input():
+    template = {'modelId': 'TEST',
+                'configParameters': {'timeZone': 'Europe/Oslo', 'threshold': 10.,
+                                     'period': {'start': '2020-03-01'}},
+                'weatherData': {'interval': 3600, 'weatherParameters': [1001]}}
+    fake = ipm_fakers.update_input(template, {'configParameters.timeZone': 'Europe/Paris',
+                                              'configParameters.period.start': '2021-03-01'})
+    assert fake['configParameters'] == {'timeZone': 'Europe/Paris', 'threshold': 10.,
+                                        'period': {'start': '2021-03-01'}}
+    assert template['configParameters'] == {'timeZone': 'Europe/Oslo', 'threshold': 10.,
+                                            'period': {'start': '2020-03-01'}}
+    assert fake['weatherData'] is template['weatherData']
+
+
+def test_model_field_observations():
+    model = make_model(make_schema(), fieldobs=True)
+    quantifications = [{'trapCount': 1}, {'trapCount': 2}]
+    obs = ipm_fakers.model_field_observations(model, quantifications, time=['2020-03-01', '2020-03-02'])
+    assert [o['quantification'] for o in obs] == quantifications
+    with pytest.raises(ValueError):
+        ipm_fakers.model_field_observations(model, quantifications, time=['2020-03-01'])
+
+
+def test_mutable_default_not_shared():
+    schema = make_schema()
+    config = schema['properties']['configParameters']['properties']
+    config['classes'] = {'type': 'array', 'items': {'type': 'integer'}, 'default': [1, 2]}
+    # no default: JSF is used
+    del config['threshold']['default']
+    model = make_model(schema)
+    fake = ipm_fakers.input_data(model)
+    fake['configParameters']['classes'].append(99)
+    assert ipm_fakers.input_data(model)['configParameters']['classes'] == [1, 2]
+
+
+def test_mutable_default_not_shared_default_instance():
+    schema = make_schema()
+    config = schema['properties']['configParameters']['properties']
+    config['classes'] = {'type': 'array', 'items': {'type': 'integer'}, 'default': [1, 2]}
+    model = make_model(schema)
+    template = ipm_fakers.input_data(model)
+    fake = ipm_fakers.update_input(template, {'configParameters.timeZone': 'Europe/Paris'})
+    fake['configParameters']['classes'].append(99)
+    assert ipm_fakers.input_data(model)['configParameters']['classes'] == [1, 2]
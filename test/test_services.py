@@ -0,0 +1,132 @@
+"""Offline tests of the REST machinery, against a local http server"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agroservices.ipm.ipm import IPM, json_dumps
+from agroservices.ipm.datadir import datadir
+
+
+class Handler(BaseHTTPRequestHandler):
+    # (method, path, headers) of received requests
+    received = []
+
+    def log_message(self, *args):
+        pass
+
+    def _answer(self, status, body=b'', headers=()):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.received.append(('GET', self.path, dict(self.headers)))
+        # all resources carry an ETag
+        if self.headers.get('If-None-Match') == '"v1"':
+            self._answer(304, headers=[('ETag', '"v1"')])
+        else:
+            if self.path.startswith('/api/dss/rest/dss'):
+                body = b'[]'
+            elif self.path.startswith('/api/wx/rest/weatherdatasource'):
+                body = b'[{"id": "ie.gov.data", "spatial": {"geoJSON": "{\\"type\\": \\"FeatureCollection\\"}"}}]'
+            else:
+                body = b'[{"id": 1001}]'
+            self._answer(200, body, [('ETag', '"v1"'), ('Content-Type', 'application/json')])
+
+    def do_POST(self):
+        self.received.append(('POST', self.path, dict(self.headers)))
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path == '/slow':
+            time.sleep(1)
+        self._answer(200, b'{}', [('Content-Type', 'application/json')])
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:%d' % httpd.server_port
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def received(method, path):
+    return [r for r in Handler.received if r[0] == method and r[1].startswith(path)]
+
+
+def test_post_read_timeout_is_not_retried(server):
+    with IPM(url=server) as ipm:
+        model = {'execution': {'type': 'ONTHEFLY', 'endpoint': server + '/slow'}}
+        res = ipm.run_model(model, {'configParameters': {}}, timeout=0.2)
+        assert res is None
+    assert len(received('POST', '/slow')) == 1
+
+
+def test_conditional_get(server):
+    with IPM(url=server) as ipm:
+        with ipm.conditional_gets():
+            first = ipm.http_get('etag', frmt='json')
+            again = ipm.http_get('etag', frmt='json')
+        assert again == first == [{'id': 1001}]
+        assert ipm.last_response.status_code == 200
+        requests = received('GET', '/etag')
+        assert 'If-None-Match' not in requests[0][2]
+        assert requests[1][2]['If-None-Match'] == '"v1"'
+        assert len(ipm._validated_responses) == 1
+
+
+def test_conditional_get_metadata_only(server):
+    with IPM(url=server) as ipm:
+        for i in range(5):
+            ipm.http_get('data', frmt='json', params={'i': i})
+        assert len(ipm._validated_responses) == 0
+        # metadata services revalidate their results
+        res = ipm.get_parameter()
+        assert ipm.get_parameter(use_cache=False) == res
+        assert received('GET', '/api/wx/rest/parameter')[-1][2]['If-None-Match'] == '"v1"'
+        assert len(ipm._validated_responses) == 1
+
+
+def test_calls_pacing():
+    with IPM(url=None, url_defined_later=True, requests_per_sec=10) as ipm:
+        start = time.time()
+        threads = [threading.Thread(target=ipm._calls) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # calls are spaced by 1 / requests_per_sec, whatever the number of threads
+        assert 0.45 < time.time() - start < 0.9
+    assert IPM(url=None, url_defined_later=True).requests_per_sec == 10
+
+
+def test_post_schema_dss_yaml_validate(server):
+    with IPM(url=server) as ipm:
+        res = ipm.post_schema_dss_yaml_validate(yamlfile=datadir + 'test_yaml_validate.yaml')
+        assert res == {}
+    request = received('POST', '/api/dss/rest/schema/dss/validate')[-1]
+    assert request[2]['Content-Type'] == 'application/json'
+
+
+def test_json_dumps():
+    class Float(float):
+        pass
+    assert json.loads(json_dumps({'value': Float(1.5), 'big': 2 ** 70})) == {'value': 1.5, 'big': 2 ** 70}
+
+
+def test_catalogues_use_cache(server):
+    with IPM(url=server) as ipm:
+        for path, getter in (('/api/dss/rest/dss', ipm.get_dss),
+                             ('/api/wx/rest/weatherdatasource', ipm.get_weatherdatasource)):
+            res = getter()
+            assert getter() == res
+            assert len(received('GET', path)) == 1
+            assert getter(use_cache=False) == res
+            assert len(received('GET', path)) == 2